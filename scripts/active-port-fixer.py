@@ -3,14 +3,11 @@
 Active Port Fixer - Continuously attempts to open and fix ports
 """
 
-import socket
-import subprocess
 import time
-import json
-import threading
-import requests
 from datetime import datetime
 
+from port_probe import resolve_host, happy_eyeballs
+
 class ActivePortFixer:
     def __init__(self):
         self.server_ip = "147.93.113.37"
@@ -31,13 +28,10 @@ class ActivePortFixer:
         self.results = {}
 
     def test_port(self, port):
-        """Test if a port is open"""
+        """Test if a port is open on any address family"""
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(1)
-            result = sock.connect_ex((self.server_ip, port))
-            sock.close()
-            return result == 0
+            # resolve_host caches, so repeated iterations never hit DNS again
+            return happy_eyeballs(resolve_host(self.server_ip), port, timeout=1) is not None
         except:
             return False
 
@@ -45,8 +39,12 @@ class ActivePortFixer:
         """Start a service on a specific port"""
         print(f"  🔧 Starting {service_name} on port {port}...")
 
+        # Only the fix path needs requests/subprocess; status checks stay light
+        import subprocess
+
         try:
             # Try via dashboard API
+            import requests
             response = requests.post(
                 f"{self.dashboard_url}/api/listen",
                 json={"port": port, "protocol": "http"},
@@ -125,6 +123,7 @@ with socketserver.TCPServer(("0.0.0.0", PORT), Handler) as httpd:
     def attempt_firewall_open(self, port):
         """Attempt to open firewall port"""
         print(f"    🔥 Attempting to open firewall for port {port}...")
+        import subprocess
 
         commands = [
             f"sudo ufw allow {port}/tcp",
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark - Catches regressions in scanner CLI start time
+Fails when heavy modules leak onto a CLI fast path; wall-clock timings
+are reported relative to a bare interpreter and only fail with --strict
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that must only load on the code paths that need them. health_check
+# is not listed: the CLIs import it for their shared options, and it defers
+# http.client/concurrent.futures to the checks themselves.
+HEAVY_MODULES = {
+    'requests', 'subprocess', 'json', 'http.client', 'urllib.request',
+    'concurrent.futures', 'mmap', 'latency_profile', 'port_history'
+}
+
+IMPORT_FIXER = (
+    "import importlib.util, sys; sys.path.insert(0, {scripts!r}); "
+    "spec = importlib.util.spec_from_file_location('fixer', {path!r}); "
+    "spec.loader.exec_module(importlib.util.module_from_spec(spec))"
+)
+
+
+def commands(port):
+    """(name, argv) pairs for every CLI fast path"""
+    python = sys.executable
+    fixer = os.path.join(SCRIPTS, 'active-port-fixer.py')
+    return [
+        ('python (baseline)', [python, '-c', 'pass']),
+        ('test-ports --single-port',
+         [python, os.path.join(SCRIPTS, 'test-ports.py'), '--host', '127.0.0.1', '--single-port', str(port)]),
+        ('comprehensive --single-port',
+         [python, os.path.join(SCRIPTS, 'comprehensive-port-scan.py'), '--host', '127.0.0.1',
+          '--single-port', str(port)]),
+        ('active-port-fixer import',
+         [python, '-c', IMPORT_FIXER.format(scripts=SCRIPTS, path=fixer)]),
+    ]
+
+
+def time_command(argv, runs):
+    """Median wall time in milliseconds over `runs` fresh interpreters"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples)
+
+
+def heavy_imports(argv):
+    """Heavy modules imported by a command, from -X importtime output"""
+    result = subprocess.run([argv[0], '-X', 'importtime'] + argv[1:],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if result.returncode not in (0, 1):
+        # 0/1 are the --single-port open/closed codes; anything else is a crash
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip()
+                           else f"exit code {result.returncode}")
+    loaded = set()
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            loaded.add(line.rsplit('|', 1)[1].strip())
+    return sorted(loaded & HEAVY_MODULES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scanner CLI startup benchmark')
+    parser.add_argument('--runs', type=int, default=10, help='Interpreter launches per command')
+    parser.add_argument('--max-ratio', type=float, default=6.0,
+                       help='Slowest allowed median as a multiple of a bare interpreter (default 6)')
+    parser.add_argument('--strict', action='store_true',
+                       help='Fail on slow timings too (default: timings are advisory)')
+    args = parser.parse_args()
+
+    # Local listener so --single-port measures startup, not network latency
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(128)
+    port = listener.getsockname()[1]
+
+    print(f"🚀 Startup benchmark ({args.runs} runs each, budget {args.max_ratio:g}x bare interpreter)")
+    print("=" * 60)
+
+    failures = []
+    slow = []
+    baseline = None
+    try:
+        for name, argv in commands(port):
+            median, best = time_command(argv, args.runs)
+            if baseline is None:
+                baseline = median
+                print(f"  {name:30} median {median:7.1f}ms  min {best:7.1f}ms")
+                continue
+
+            ratio = median / baseline
+            try:
+                heavy = heavy_imports(argv)
+                error = None
+            except RuntimeError as e:
+                heavy, error = [], str(e)
+
+            symbol = "❌" if heavy or error else ("⚠️ " if ratio > args.max_ratio else "✅")
+            print(f"  {symbol} {name:28} median {median:7.1f}ms  min {best:7.1f}ms  ({ratio:.1f}x)")
+            if heavy:
+                print(f"     heavy imports on fast path: {', '.join(heavy)}")
+            if error:
+                print(f"     failed to run: {error}")
+            if heavy or error:
+                failures.append(name)
+            elif ratio > args.max_ratio:
+                slow.append(name)
+    finally:
+        listener.close()
+
+    if slow:
+        print(f"\n⚠️  Slower than {args.max_ratio:g}x a bare interpreter: {', '.join(slow)}")
+        if args.strict:
+            failures.extend(slow)
+    if failures:
+        print(f"\n❗ Startup regression: {', '.join(failures)}")
+        sys.exit(1)
+    print("\n✅ No heavy imports on the fast paths")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,22 +3,32 @@
 Comprehensive Port Scanner - Tests ALL ports for rogue/unexpected services
 """
 
-import socket
 import threading
 import time
 from datetime import datetime
-import json
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from port_probe import resolve_host, probe_families, open_connection, FAMILIES, FAMILY_NAMES
+
+# Thread pools, health checks, history and JSON reports load on first use
+# so --single-port stays cheap (see bench-startup.py).
 
 class ComprehensivePortScanner:
-    def __init__(self, host='147.93.113.37'):
+    def __init__(self, host='147.93.113.37', family='any', history_dir=None, record_history=True):
         self.host = host
+        self.family = family
+        self.history_dir = history_dir
+        self.record_history = record_history
+        self.scanned_ports = set()
+        # Resolve once; every probe reuses the cached addresses
+        self.addresses = resolve_host(host, family)
+        self.family_open = {FAMILY_NAMES[af]: [] for af, _ in self.addresses}
         self.open_ports = []
         self.closed_ports = []
         self.filtered_ports = []
         self.lock = threading.Lock()
         self.results = {}
+        self.health = {}
 
         # Known/Expected ports
         self.expected_ports = {
@@ -75,33 +85,36 @@ class ComprehensivePortScanner:
         }
 
     def scan_port(self, port, timeout=0.5):
-        """Quick port scan with short timeout"""
+        """Quick port scan with short timeout, per address family"""
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(timeout)
-            result = sock.connect_ex((self.host, port))
-            sock.close()
-            return result == 0
+            return probe_families(self.addresses, port, timeout)
         except:
-            return False
+            return {}
 
     def identify_service(self, port):
         """Try to identify what service is running on the port"""
         try:
-            # Try to grab banner
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(2)
-            sock.connect((self.host, port))
-            sock.send(b'HEAD / HTTP/1.0\r\n\r\n')
-            banner = sock.recv(1024).decode('utf-8', errors='ignore')
-            sock.close()
+            # Grab the banner on the connection that won the race (one handshake)
+            winner = open_connection(self.addresses, port, timeout=2)
+            if winner is None:
+                return "Unknown"
+            _, sock = winner
+            try:
+                sock.settimeout(2)
+                sock.send(b'HEAD / HTTP/1.0\r\n\r\n')
+                banner = sock.recv(1024).decode('utf-8', errors='ignore')
+            finally:
+                sock.close()
             return banner[:100] if banner else "Unknown"
         except:
             return "Unknown"
 
     def scan_range_threaded(self, start_port, end_port, max_threads=100):
         """Scan a range of ports using thread pool"""
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
         print(f"Scanning ports {start_port}-{end_port}...")
+        self.scanned_ports.update(range(start_port, end_port + 1))
 
         with ThreadPoolExecutor(max_workers=max_threads) as executor:
             futures = []
@@ -114,35 +127,40 @@ class ComprehensivePortScanner:
 
     def check_port(self, port):
         """Check a single port and categorize it"""
-        is_open = self.scan_port(port)
+        families = self.scan_port(port)
+        if not any(families.values()):
+            return
+
+        # Check if it's expected or rogue (banner grabbing happens outside the lock)
+        if port in self.expected_ports:
+            service = self.expected_ports[port]
+            status = "EXPECTED"
+        elif port in self.common_ports:
+            service = self.common_ports[port]
+            status = "COMMON SERVICE"
+        else:
+            service = self.identify_service(port)
+            status = "ROGUE/UNEXPECTED"
 
         with self.lock:
-            if is_open:
-                self.open_ports.append(port)
-
-                # Check if it's expected or rogue
-                if port in self.expected_ports:
-                    service = self.expected_ports[port]
-                    status = "EXPECTED"
-                elif port in self.common_ports:
-                    service = self.common_ports[port]
-                    status = "COMMON SERVICE"
-                else:
-                    service = self.identify_service(port)
-                    status = "ROGUE/UNEXPECTED"
-
-                self.results[port] = {
-                    "status": "open",
-                    "service": service,
-                    "category": status,
-                    "timestamp": datetime.now().isoformat()
-                }
-
-                # Print immediately for rogue ports
-                if status == "ROGUE/UNEXPECTED":
-                    print(f"🚨 ROGUE PORT FOUND: {port} - {service}")
-                elif status == "COMMON SERVICE":
-                    print(f"⚠️  Common Service: {port} ({service})")
+            self.open_ports.append(port)
+            for name, family_is_open in families.items():
+                if family_is_open:
+                    self.family_open[name].append(port)
+
+            self.results[port] = {
+                "status": "open",
+                "service": service,
+                "category": status,
+                "families": {name: "open" if ok else "closed" for name, ok in families.items()},
+                "timestamp": datetime.now().isoformat()
+            }
+
+            # Print immediately for rogue ports
+            if status == "ROGUE/UNEXPECTED":
+                print(f"🚨 ROGUE PORT FOUND: {port} - {service}")
+            elif status == "COMMON SERVICE":
+                print(f"⚠️  Common Service: {port} ({service})")
 
     def quick_scan(self):
         """Quick scan of common ports"""
@@ -151,14 +169,22 @@ class ComprehensivePortScanner:
         print("="*60)
 
         all_check_ports = {**self.expected_ports, **self.common_ports}
+        self.scanned_ports.update(all_check_ports)
 
         for port, service in sorted(all_check_ports.items()):
-            if self.scan_port(port):
+            families = self.scan_port(port)
+            if any(families.values()):
                 self.open_ports.append(port)
+                for name, family_is_open in families.items():
+                    if family_is_open:
+                        self.family_open[name].append(port)
+                family_detail = ""
+                if len(families) > 1:
+                    family_detail = " [" + ", ".join(name for name, ok in families.items() if ok) + "]"
                 if port in self.expected_ports:
-                    print(f"✅ Port {port:5} ({service:15}): OPEN (Expected)")
+                    print(f"✅ Port {port:5} ({service:15}): OPEN (Expected){family_detail}")
                 else:
-                    print(f"⚠️  Port {port:5} ({service:15}): OPEN (Unexpected)")
+                    print(f"⚠️  Port {port:5} ({service:15}): OPEN (Unexpected){family_detail}")
             else:
                 if port in self.expected_ports:
                     print(f"❌ Port {port:5} ({service:15}): CLOSED")
@@ -188,14 +214,27 @@ class ComprehensivePortScanner:
             if rogue_in_range:
                 print(f"  Found {len(rogue_in_range)} unexpected open ports in this range")
 
+    def verify_health(self, **options):
+        """Health-check open HTTP ports concurrently after the scan"""
+        from health_check import verify_ports
+
+        self.health = verify_ports(self.host, self.addresses, sorted(self.open_ports), **options)
+        return self.health
+
     def generate_report(self):
         """Generate comprehensive report"""
+        import json
+        from health_check import print_health_report
+
         print("\n" + "="*60)
         print("📊 COMPREHENSIVE PORT SCAN REPORT")
         print("="*60)
         print(f"Host: {self.host}")
         print(f"Scan Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"Total Open Ports: {len(self.open_ports)}")
+        if len(self.family_open) > 1:
+            for name, ports in sorted(self.family_open.items()):
+                print(f"  {name} Open Ports: {len(ports)}")
 
         # Categorize results
         expected_open = [p for p in self.open_ports if p in self.expected_ports]
@@ -217,6 +256,8 @@ class ComprehensivePortScanner:
                 service = self.results.get(port, {}).get('service', 'Unknown')
                 print(f"  - Port {port:5}: {service}")
 
+        print_health_report(self.health)
+
         # Security recommendations
         print("\n🔒 SECURITY RECOMMENDATIONS:")
         if rogue_ports:
@@ -245,11 +286,23 @@ class ComprehensivePortScanner:
                     "common_unexpected": len(common_unexpected),
                     "rogue": len(rogue_ports)
                 },
-                "open_ports": self.results
+                "families": {name: sorted(ports) for name, ports in self.family_open.items()},
+                "open_ports": self.results,
+                "health": self.health
             }, f, indent=2)
 
         print(f"\n💾 Detailed report saved to: {report_file}")
 
+        if self.record_history:
+            from port_history import record_scan
+
+            # Per-family series only when both families resolved; otherwise they
+            # would duplicate the run's own record
+            record_scan(self.host, self.scanned_ports, set(self.open_ports), 'comprehensive',
+                        family=self.family,
+                        families=self.family_open if len(self.family_open) > 1 else None,
+                        directory=self.history_dir)
+
         return {
             "expected": expected_open,
             "rogue": rogue_ports,
@@ -257,16 +310,44 @@ class ComprehensivePortScanner:
         }
 
 def main():
-    print("""
+    import argparse
+    from health_check import add_health_arguments, health_options
+
+    parser = argparse.ArgumentParser(description='Comprehensive Port Security Scanner')
+    parser.add_argument('--host', default='147.93.113.37', help='Host to scan')
+    parser.add_argument('--family', choices=sorted(FAMILIES), default='any',
+                       help='Address family to scan: 4, 6 or any (dual-stack)')
+    parser.add_argument('--history-dir', help='Scan history directory (default ./port_history)')
+    parser.add_argument('--no-history', action='store_true', help='Do not append this run to the history')
+    add_health_arguments(parser)
+    parser.add_argument('--single-port', type=int, metavar='PORT',
+                       help='Check one port and exit without banner or report '
+                            '(0 open, 1 closed, 3 unresolved host; 2 is a usage error)')
+    args = parser.parse_args()
+
+    if args.single_port is not None:
+        scanner = ComprehensivePortScanner(args.host, args.family, record_history=False)
+        if not scanner.addresses:
+            print(f"❌ Unable to resolve {args.host}")
+            sys.exit(3)
+        families = scanner.scan_port(args.single_port)
+        for name, is_open in families.items():
+            print(f"Port {args.single_port} ({name}): {'✅ OPEN' if is_open else '❌ CLOSED'}")
+        sys.exit(0 if any(families.values()) else 1)
+
+    print(f"""
 ╔══════════════════════════════════════════════════════════════╗
 ║          🔍 COMPREHENSIVE PORT SECURITY SCANNER              ║
 ╠══════════════════════════════════════════════════════════════╣
 ║  Scanning for ROGUE and UNEXPECTED open ports                ║
-║  Target: 147.93.113.37                                       ║
+║  Target: {args.host:51} ║
 ╚══════════════════════════════════════════════════════════════╝
     """)
 
-    scanner = ComprehensivePortScanner()
+    scanner = ComprehensivePortScanner(args.host, args.family, args.history_dir, not args.no_history)
+    if not scanner.addresses:
+        print(f"❌ Unable to resolve {args.host}")
+        sys.exit(1)
 
     # Quick scan first
     scanner.quick_scan()
@@ -282,6 +363,9 @@ def main():
     except KeyboardInterrupt:
         print("\nSkipping full scan...")
 
+    if args.health:
+        scanner.verify_health(**health_options(args))
+
     # Generate report
     results = scanner.generate_report()
 
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Service Health Verification - Concurrent HTTP checks of open ports
+Reuses keep-alive connections and records TTFB/total latency per check
+"""
+
+import threading
+import time
+
+from port_probe import resolve_host, open_connection, positive_float
+
+# http.client and concurrent.futures are imported where a check actually
+# runs, so the scanner CLIs can build their parsers from this module cheaply.
+
+# Ports that usually speak plain HTTP and get a health check after a scan
+HTTP_PORTS = {80, 3000, 3001, 4000, 5000, 6000, 8000, 8001, 8008, 8080, 8081, 8888, 8889, 9090}
+
+
+def _stale_errors():
+    """Errors that mean an idle keep-alive connection was closed by the server"""
+    import http.client
+
+    return (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class ConnectionPool:
+    """Idle keep-alive HTTP connections keyed by port"""
+
+    def __init__(self, host, addresses):
+        self.host = host
+        self.addresses = addresses
+        self.idle = {}
+        self.routes = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, port, timeout):
+        """Return (connection, reused) for a port, opening one if none is idle"""
+        import http.client
+
+        with self.lock:
+            connections = self.idle.get(port)
+            if connections:
+                return connections.pop(), True
+
+            route = self.routes.get(port)
+
+        # Race the address families once per port, then keep using the winner
+        winner = open_connection((route,), port, timeout) if route else None
+        if winner is None:
+            winner = open_connection(self.addresses, port, timeout)
+        if winner is None:
+            raise ConnectionRefusedError(f"port {port} is not accepting connections")
+        address, sock = winner
+        with self.lock:
+            self.routes[port] = address
+
+        # Hand over the socket that won the race: no second handshake, and the
+        # IPv6 scope id of link-local addresses is kept. Never reconnect on our own.
+        sock.settimeout(timeout)
+        conn = http.client.HTTPConnection(address[1][0], port, timeout=timeout)
+        conn.sock = sock
+        conn.auto_open = 0
+        return conn, False
+
+    def release(self, port, conn):
+        """Keep a connection for reuse unless the server asked to close it"""
+        if conn.sock is None:
+            return
+        with self.lock:
+            self.idle.setdefault(port, []).append(conn)
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self.lock:
+            for connections in self.idle.values():
+                for conn in connections:
+                    conn.close()
+            self.idle = {}
+
+
+class HealthChecker:
+    def __init__(self, host, addresses=None, paths=('/health',), expect_status=(200,),
+                 expect_body=None, timeout=5, max_workers=20):
+        self.host = host
+        self.addresses = addresses if addresses is not None else resolve_host(host)
+        self.paths = list(paths)
+        self.expect_status = set(expect_status)
+        self.expect_body = expect_body
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.pool = ConnectionPool(host, self.addresses)
+
+    def host_header(self, port):
+        """Host header for the original name, bracketing IPv6 literals"""
+        host = f"[{self.host}]" if ':' in self.host else self.host
+        return f"{host}:{port}"
+
+    def _request(self, port, path, deadline):
+        """One GET on a pooled connection; returns (status, body, ttfb)"""
+        remaining = max(deadline - time.monotonic(), 0.001)
+        conn, reused = self.pool.acquire(port, remaining)
+        try:
+            start = time.perf_counter()
+            if conn.sock is not None:
+                conn.sock.settimeout(max(deadline - time.monotonic(), 0.001))
+            conn.request('GET', path, headers={'Host': self.host_header(port), 'Connection': 'keep-alive'})
+            # getresponse() drops conn.sock when the server closes; keep the socket for the body
+            sock = conn.sock
+            sock.settimeout(max(deadline - time.monotonic(), 0.001))
+            response = conn.getresponse()
+            ttfb = time.perf_counter() - start
+            body = self._read_body(sock, response, deadline)
+        except _stale_errors():
+            conn.close()
+            if not reused:
+                raise
+            # The server dropped an idle connection; retry once on a fresh one
+            return self._request(port, path, deadline)
+        except Exception:
+            conn.close()
+            raise
+        self.pool.release(port, conn)
+        return response.status, body, ttfb
+
+    @staticmethod
+    def _read_body(sock, response, deadline):
+        """Read the body in chunks so a slow server cannot outlast the deadline"""
+        chunks = []
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("timed out")
+            sock.settimeout(remaining)
+            chunk = response.read1(65536)
+            if not chunk:
+                # read() finishes the response so the connection can be reused
+                chunks.append(response.read())
+                return b''.join(chunks)
+            chunks.append(chunk)
+
+    def check(self, port, path='/health'):
+        """Run one health check against a port within the per-check deadline"""
+        result = {
+            'path': path,
+            'healthy': False,
+            'status_code': None,
+            'ttfb_ms': None,
+            'total_ms': None,
+            'error': None
+        }
+        start = time.perf_counter()
+        try:
+            status, body, ttfb = self._request(port, path, time.monotonic() + self.timeout)
+        except Exception as e:
+            result['error'] = str(e) or type(e).__name__
+            return result
+
+        result['status_code'] = status
+        result['ttfb_ms'] = round(ttfb * 1000, 2)
+        result['total_ms'] = round((time.perf_counter() - start) * 1000, 2)
+
+        if status not in self.expect_status:
+            result['error'] = f"unexpected status {status}"
+        elif self.expect_body and self.expect_body not in body.decode('utf-8', errors='ignore'):
+            result['error'] = f"body missing {self.expect_body!r}"
+        else:
+            result['healthy'] = True
+        return result
+
+    def check_port(self, port):
+        """Check every configured path on one port over a shared connection"""
+        checks = [self.check(port, path) for path in self.paths]
+        return {
+            'healthy': all(c['healthy'] for c in checks),
+            'checks': checks
+        }
+
+    def check_all(self, ports):
+        """Check all ports concurrently and return {port: result}"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        ports = sorted(ports)
+        if not ports:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(ports))) as executor:
+            results = dict(zip(ports, executor.map(self.check_port, ports)))
+        return results
+
+    def close(self):
+        """Release pooled connections"""
+        self.pool.close_all()
+
+
+def verify_ports(host, addresses, open_ports, paths=('/health',), expect_status=(200,),
+                 expect_body=None, timeout=5, ports=None):
+    """Health-check the HTTP services among a scan's open ports; returns {port: result}"""
+    http_ports = set(ports) if ports else HTTP_PORTS
+    targets = [p for p in open_ports if p in http_ports]
+
+    print(f"\n🩺 Verifying health of {len(targets)} HTTP service(s)")
+    print("=" * 60)
+
+    checker = HealthChecker(host, addresses, paths=paths, expect_status=expect_status,
+                            expect_body=expect_body, timeout=timeout)
+    try:
+        return checker.check_all(targets)
+    finally:
+        checker.close()
+
+
+def add_health_arguments(parser):
+    """Add the --health options shared by the scanner CLIs"""
+    parser.add_argument('--health', action='store_true',
+                       help='Verify HTTP health of open ports after the scan')
+    parser.add_argument('--health-path', action='append', dest='health_paths', metavar='PATH',
+                       help='Path to check (repeatable, default /health)')
+    parser.add_argument('--health-ports', nargs='+', type=int, metavar='PORT',
+                       help='Ports treated as HTTP services (default: well-known HTTP ports)')
+    parser.add_argument('--expect-status', nargs='+', type=int, default=[200], metavar='CODE',
+                       help='Acceptable HTTP status codes (default 200)')
+    parser.add_argument('--expect-body', metavar='TEXT', help='Text the response body must contain')
+    parser.add_argument('--health-timeout', type=positive_float, default=5, metavar='SECONDS',
+                       help='Deadline per health check (default 5)')
+
+
+def health_options(args):
+    """verify_ports() keyword arguments from options added by add_health_arguments()"""
+    return {
+        'paths': args.health_paths or ['/health'],
+        'expect_status': args.expect_status,
+        'expect_body': args.expect_body,
+        'timeout': args.health_timeout,
+        'ports': args.health_ports
+    }
+
+
+def print_health_report(health):
+    """Print health results merged into a scan report"""
+    if not health:
+        return
+    healthy = sum(1 for r in health.values() if r['healthy'])
+    print(f"\n🩺 Service Health ({healthy}/{len(health)} healthy):")
+    for port in sorted(health):
+        for check in health[port]['checks']:
+            symbol = "✅" if check['healthy'] else "❌"
+            if check['status_code'] is None:
+                detail = f"error: {check['error']}"
+            else:
+                detail = f"{check['status_code']}  ttfb {check['ttfb_ms']}ms  total {check['total_ms']}ms"
+                if check['error']:
+                    detail += f"  ({check['error']})"
+            print(f"  {symbol} {port:5} {check['path']:15} {detail}")
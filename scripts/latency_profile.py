@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Latency Profiler - Continuous TCP handshake timing for open ports
+Keeps bounded-memory percentile sketches and jitter per port and address
+"""
+
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from port_probe import connect_addresses, family_name
+
+
+class LatencySketch:
+    """
+    Streaming quantile sketch with log-spaced buckets (DDSketch style).
+    Quantiles are within `relative_accuracy` of the true value and memory
+    never exceeds `max_buckets` counters, however many samples are added.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048, min_value=1e-6):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.min_value = min_value
+        self.buckets = {}
+        self.count = 0
+        self.failures = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.last = None
+        self.jitter = 0.0
+
+    def add(self, value):
+        """Record one handshake time in seconds"""
+        value = max(value, self.min_value)
+        index = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+        # RFC 3550 interarrival jitter: smoothed mean of successive differences
+        if self.last is not None:
+            self.jitter += (abs(value - self.last) - self.jitter) / 16
+        self.last = value
+
+    def add_failure(self):
+        """Record a probe that did not complete a handshake"""
+        self.failures += 1
+
+    def _collapse(self):
+        """Fold the two lowest buckets together to stay within max_buckets"""
+        lowest, second = sorted(self.buckets)[:2]
+        self.buckets[second] += self.buckets.pop(lowest)
+
+    def quantile(self, q):
+        """Estimated value at quantile q (0..1), or None without samples"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return min(max(2 * self.gamma ** index / (self.gamma + 1), self.min), self.max)
+        return self.max
+
+    def summary(self):
+        """Millisecond summary of the sketch"""
+        def ms(value):
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            'samples': self.count,
+            'failures': self.failures,
+            'min_ms': ms(self.min),
+            'mean_ms': ms(self.total / self.count) if self.count else None,
+            'p50_ms': ms(self.quantile(0.50)),
+            'p95_ms': ms(self.quantile(0.95)),
+            'p99_ms': ms(self.quantile(0.99)),
+            'max_ms': ms(self.max),
+            'jitter_ms': ms(self.jitter) if self.count > 1 else None
+        }
+
+
+class PortProfiler:
+    def __init__(self, addresses, ports, sample_rate=1.0, timeout=1, max_workers=20):
+        self.addresses = addresses
+        self.ports = sorted(ports)
+        if sample_rate <= 0:
+            raise ValueError("sample_rate must be greater than 0")
+        self.interval = 1.0 / sample_rate
+        # Independent of the interval: slow handshakes are latency, not loss.
+        # Ticks that overrun are skipped by run().
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.sketches = {}
+        self.lock = threading.Lock()
+        self.running = False
+
+    def sample_port(self, port):
+        """Measure one handshake per resolved address of a port"""
+        timings = connect_addresses(self.addresses, port, self.timeout)
+        with self.lock:
+            for address, elapsed in timings.items():
+                # Per address: hosts of one family can differ widely in latency
+                sketch = self.sketches.setdefault((port, address), LatencySketch())
+                if elapsed is None:
+                    sketch.add_failure()
+                else:
+                    sketch.add(elapsed)
+
+    def run(self, duration=None):
+        """Sample every port at the configured rate until duration elapses (None = until stopped)"""
+        if not self.ports:
+            return self.summary()
+
+        self.running = True
+        end = None if duration is None else time.monotonic() + duration
+        next_tick = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(self.ports))) as executor:
+            try:
+                while self.running and (end is None or time.monotonic() < end):
+                    list(executor.map(self.sample_port, self.ports))
+
+                    # Fixed-rate schedule; skip ticks we overran instead of bursting
+                    next_tick += self.interval
+                    now = time.monotonic()
+                    if next_tick < now:
+                        next_tick = now
+                    time.sleep(next_tick - now)
+            except KeyboardInterrupt:
+                print("\nStopping latency profiling...")
+            finally:
+                self.running = False
+
+        return self.summary()
+
+    def stop(self):
+        """Stop a running profile after the current tick"""
+        self.running = False
+
+    def label(self, address):
+        """Family name, plus the IP when the family resolved to several addresses"""
+        family = family_name(address)
+        if sum(1 for a in self.addresses if a[0] == address[0]) > 1:
+            return f"{family} {address[1][0]}"
+        return family
+
+    def summary(self):
+        """{port: {label: sketch summary}}, labels grouped by family"""
+        with self.lock:
+            report = {}
+            # Grouped by family, in resolver order within a family
+            order = sorted(self.sketches, key=lambda k: (k[0], family_name(k[1]), self.addresses.index(k[1])))
+            for port, address in order:
+                stats = self.sketches[(port, address)].summary()
+                stats['address'] = address[1][0]
+                report.setdefault(port, {})[self.label(address)] = stats
+            return report
+
+
+def print_latency_report(latency):
+    """Print per-port handshake latency merged into a scan report"""
+    if not latency:
+        return
+
+    def fmt(value):
+        return "-" if value is None else f"{value:.2f}"
+
+    width = max(len(label) for stats in latency.values() for label in stats)
+    width = max(width, len('Family'))
+
+    print("\n⏱️  Handshake Latency (ms):")
+    print(f"  {'Port':>5} {'Family':{width}} {'p50':>8} {'p95':>8} {'p99':>8} {'jitter':>8} {'loss':>6}")
+    for port in sorted(latency):
+        for label, stats in latency[port].items():
+            attempts = stats['samples'] + stats['failures']
+            loss = f"{100 * stats['failures'] / attempts:.1f}%" if attempts else "-"
+            print(f"  {port:5} {label:{width}} {fmt(stats['p50_ms']):>8} {fmt(stats['p95_ms']):>8} "
+                  f"{fmt(stats['p99_ms']):>8} {fmt(stats['jitter_ms']):>8} {loss:>6}")
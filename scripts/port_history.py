@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Port History Store - Compact append-only binary log of scan runs
+Answers "when did port X first open?" and "which ports flapped?" without
+loading every JSON report
+"""
+
+import argparse
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+DEFAULT_DIR = os.environ.get('PORT_HISTORY_DIR', 'port_history')
+
+MAGIC = b'PHST'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sHH')
+
+# timestamp, scanner, family, encoding, pad, range count, open port count
+RECORD = struct.Struct('<dBBBxHH')
+RANGE = struct.Struct('<HH')
+
+ENCODING_LIST = 0    # sorted uint16 open ports
+ENCODING_BITMAP = 1  # 65536-bit open port bitmap, used once it is smaller
+BITMAP_SIZE = 8192
+
+SCANNERS = {'test-ports': 1, 'comprehensive': 2}
+SCANNER_NAMES = {v: k for k, v in SCANNERS.items()}
+
+# Every run writes one record under the scan's --family selection (0 = any);
+# runs that resolved both families also write one record per family.
+# '4' and '6' are the scanners' spellings of the same selections.
+FAMILY_CODES = {'any': 0, 'IPv4': 4, 'IPv6': 6, '4': 4, '6': 6}
+
+
+def _to_ranges(ports):
+    """Collapse scanned ports into inclusive (start, end) ranges"""
+    ranges = []
+    for port in sorted(set(ports)):
+        if ranges and port == ranges[-1][1] + 1:
+            ranges[-1][1] = port
+        else:
+            ranges.append([port, port])
+    return ranges
+
+
+def _history_path(host, directory):
+    """One history file per host"""
+    safe = re.sub(r'[^A-Za-z0-9._-]', '_', host)
+    return os.path.join(directory, f"{safe}.phist")
+
+
+def encode_record(scanned, open_ports, timestamp, scanner, family=0):
+    """Serialize one run into its on-disk form"""
+    ranges = _to_ranges(scanned)
+    open_ports = sorted(set(open_ports))
+    if 2 * len(open_ports) >= BITMAP_SIZE:
+        encoding = ENCODING_BITMAP
+        bitmap = bytearray(BITMAP_SIZE)
+        for port in open_ports:
+            bitmap[port >> 3] |= 1 << (port & 7)
+        payload = bytes(bitmap)
+    else:
+        encoding = ENCODING_LIST
+        payload = array('H', open_ports)
+        if sys.byteorder == 'big':
+            payload.byteswap()
+        payload = payload.tobytes()
+
+    header = RECORD.pack(timestamp, scanner, family, encoding, len(ranges), len(open_ports))
+    return header + b''.join(RANGE.pack(s, e) for s, e in ranges) + payload
+
+
+class Record:
+    """One run decoded from a memory-mapped history file"""
+
+    __slots__ = ('timestamp', 'scanner', 'family', 'encoding', 'ranges', 'open_count', '_open')
+
+    def __init__(self, buf, offset):
+        (self.timestamp, self.scanner, self.family, self.encoding,
+         n_ranges, self.open_count) = RECORD.unpack_from(buf, offset)
+        offset += RECORD.size
+        self.ranges = [RANGE.unpack_from(buf, offset + i * RANGE.size) for i in range(n_ranges)]
+        offset += n_ranges * RANGE.size
+        # Copy the payload out so records never pin the mapping open
+        if self.encoding == ENCODING_BITMAP:
+            self._open = bytes(buf[offset:offset + BITMAP_SIZE])
+        else:
+            self._open = array('H')
+            self._open.frombytes(buf[offset:offset + 2 * self.open_count])
+            if sys.byteorder == 'big':
+                self._open.byteswap()
+
+    def scanned(self, port):
+        """Whether this run probed the port"""
+        return any(start <= port <= end for start, end in self.ranges)
+
+    def is_open(self, port):
+        """Whether the port was open in this run"""
+        if self.encoding == ENCODING_BITMAP:
+            return bool(self._open[port >> 3] & (1 << (port & 7)))
+        i = bisect_left(self._open, port)
+        return i < len(self._open) and self._open[i] == port
+
+    def state(self, port):
+        """True/False when scanned, None when the run did not probe the port"""
+        return self.is_open(port) if self.scanned(port) else None
+
+    def open_ports(self):
+        """All open ports of the run"""
+        if self.encoding == ENCODING_BITMAP:
+            return [p for p in range(65536) if self._open[p >> 3] & (1 << (p & 7))]
+        return list(self._open)
+
+
+class HistoryStore:
+    def __init__(self, host, directory=None):
+        self.host = host
+        self.directory = directory or DEFAULT_DIR
+        self.path = _history_path(host, self.directory)
+
+    def append(self, scanned, open_ports, timestamp=None, scanner='test-ports', family='any',
+               families=None):
+        """Append one run under its family selection, plus optional {family: open_ports}"""
+        timestamp = time.time() if timestamp is None else timestamp
+        scanned = list(scanned)
+        data = encode_record(scanned, open_ports, timestamp, SCANNERS[scanner], FAMILY_CODES[family])
+        for name, family_open in sorted((families or {}).items()):
+            data += encode_record(scanned, family_open, timestamp, SCANNERS[scanner], FAMILY_CODES[name])
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._create()
+        # One write per run on an O_APPEND descriptor keeps concurrent writers from interleaving
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+        return self.path
+
+    def _create(self):
+        """Atomically create the file with its header; a no-op if it already exists"""
+        if os.path.exists(self.path):
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(FILE_HEADER.pack(MAGIC, VERSION, 0))
+        try:
+            # link() fails if another writer created the file first, so only one header wins
+            os.link(tmp, self.path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp)
+
+    def records(self, since=None, until=None, family=0):
+        """Iterate runs in append order, optionally limited by time and family"""
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            if os.fstat(f.fileno()).st_size < FILE_HEADER.size:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                buf = memoryview(mm)
+                try:
+                    magic, version, _ = FILE_HEADER.unpack_from(buf, 0)
+                    if magic != MAGIC or version != VERSION:
+                        raise ValueError(f"{self.path} is not a port history file")
+
+                    header = bytes(buf[:FILE_HEADER.size])
+                    offset = FILE_HEADER.size
+                    end = len(buf)
+                    while offset + RECORD.size <= end:
+                        # Files written by racing first runs before headers were created atomically
+                        if buf[offset:offset + FILE_HEADER.size] == header:
+                            offset += FILE_HEADER.size
+                            continue
+                        # Headers alone are enough to skip runs that do not match
+                        timestamp, _, record_family, encoding, n_ranges, n_open = RECORD.unpack_from(buf, offset)
+                        payload = BITMAP_SIZE if encoding == ENCODING_BITMAP else 2 * n_open
+                        size = RECORD.size + n_ranges * RANGE.size + payload
+                        if offset + size > end:
+                            break  # partially written tail
+                        if (record_family == family
+                                and (since is None or timestamp >= since)
+                                and (until is None or timestamp <= until)):
+                            yield Record(buf, offset)
+                        offset += size
+                finally:
+                    buf.release()
+
+    def first_open(self, port, family=0):
+        """Timestamp of the first run that saw the port open, or None"""
+        for record in self.records(family=family):
+            if record.scanned(port) and record.is_open(port):
+                return record.timestamp
+        return None
+
+    def timeline(self, port, since=None, family=0):
+        """[(timestamp, is_open)] for each state change of a port"""
+        changes = []
+        last = None
+        for record in self.records(since=since, family=family):
+            state = record.state(port)
+            if state is not None and state != last:
+                changes.append((record.timestamp, state))
+                last = state
+        return changes
+
+    def flaps(self, since=None, family=0):
+        """{port: transitions} for ports whose state changed within the window"""
+        last = {}
+        transitions = {}
+        scanned_before = set()
+        runs = 0
+        for record in self.records(since=since, family=family):
+            runs += 1
+            # Only ports that have been open can flap, so never-open ports stay cheap.
+            # A port first seen open was closed in every earlier run that scanned it.
+            for port in record.open_ports():
+                if port not in last:
+                    scanned = any(start <= port <= end for start, end in scanned_before)
+                    last[port] = False if scanned else None
+            for port, previous in last.items():
+                state = record.state(port)
+                if state is None:
+                    continue
+                if previous is not None and state != previous:
+                    transitions[port] = transitions.get(port, 0) + 1
+                last[port] = state
+            scanned_before.update(record.ranges)
+        return transitions, runs
+
+
+def record_scan(host, scanned, open_ports, scanner, family='any', families=None, directory=None):
+    """Append a finished scan to the host's history, reporting rather than raising on failure"""
+    try:
+        path = HistoryStore(host, directory).append(scanned, open_ports, scanner=scanner,
+                                                   family=family, families=families)
+        print(f"🗃️  Run appended to history: {path}")
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Unable to record history: {e}")
+
+
+def parse_since(value):
+    """Accept 7d / 12h / 30m / 45s or an ISO date"""
+    if value is None:
+        return None
+    match = re.fullmatch(r'(\d+)([dhms])', value)
+    if match:
+        unit = {'d': 'days', 'h': 'hours', 'm': 'minutes', 's': 'seconds'}[match.group(2)]
+        return (datetime.now() - timedelta(**{unit: int(match.group(1))})).timestamp()
+    return datetime.fromisoformat(value).timestamp()
+
+
+def _fmt(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def run_query(store, args, family):
+    """Dispatch one query subcommand"""
+    if args.command == 'first-open':
+        timestamp = store.first_open(args.port, family)
+        if timestamp is None:
+            print(f"Port {args.port} has never been seen open on {args.host}")
+            sys.exit(1)
+        print(f"Port {args.port} first open on {args.host} at {_fmt(timestamp)}")
+
+    elif args.command == 'timeline':
+        changes = store.timeline(args.port, parse_since(args.since), family)
+        if not changes:
+            print(f"No runs scanned port {args.port} on {args.host}")
+        for timestamp, is_open in changes:
+            print(f"{_fmt(timestamp)}  {'✅ OPEN' if is_open else '❌ CLOSED'}")
+
+    elif args.command == 'flaps':
+        transitions, total = store.flaps(parse_since(args.since), family)
+        flapping = {p: n for p, n in transitions.items() if n >= args.min}
+        print(f"{len(flapping)} port(s) flapped on {args.host} across {total} run(s) since {args.since}")
+        for port, count in sorted(flapping.items(), key=lambda item: (-item[1], item[0])):
+            print(f"  - Port {port:5}: {count} transition(s)")
+
+    elif args.command == 'runs':
+        for record in store.records(since=parse_since(args.since), family=family):
+            scanned = sum(end - start + 1 for start, end in record.ranges)
+            print(f"{_fmt(record.timestamp)}  {SCANNER_NAMES.get(record.scanner, '?'):13} "
+                  f"scanned {scanned:5}  open {record.open_count}")
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query port scan history')
+    parser.add_argument('--dir', default=DEFAULT_DIR, help='History directory')
+    parser.add_argument('--host', default='147.93.113.37', help='Host to query')
+    parser.add_argument('--family', choices=sorted(FAMILY_CODES), default='any',
+                       help='Address family records to query')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    first = sub.add_parser('first-open', help='When did a port first open?')
+    first.add_argument('port', type=int)
+
+    timeline = sub.add_parser('timeline', help='State changes of a port')
+    timeline.add_argument('port', type=int)
+    timeline.add_argument('--since', help='Window start: 7d, 12h, 30m or ISO date')
+
+    flaps = sub.add_parser('flaps', help='Ports that changed state')
+    flaps.add_argument('--since', default='7d', help='Window start (default 7d)')
+    flaps.add_argument('--min', type=int, default=1, help='Minimum transitions to report')
+
+    runs = sub.add_parser('runs', help='List recorded runs')
+    runs.add_argument('--since', help='Window start: 7d, 12h, 30m or ISO date')
+
+    args = parser.parse_args()
+    try:
+        run_query(HistoryStore(args.host, args.dir), args, FAMILY_CODES[args.family])
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Port Probe Engine - Shared name resolution and TCP connect probing
+Resolves each host once and probes IPv4/IPv6 addresses concurrently
+"""
+
+import errno
+import selectors
+import socket
+import threading
+import time
+
+# Address family selection accepted by the scanner CLIs (--family)
+FAMILIES = {
+    'any': socket.AF_UNSPEC,
+    '4': socket.AF_INET,
+    '6': socket.AF_INET6
+}
+
+FAMILY_NAMES = {
+    socket.AF_INET: 'IPv4',
+    socket.AF_INET6: 'IPv6'
+}
+
+# RFC 8305 recommends 250ms between connection attempts
+HAPPY_EYEBALLS_DELAY = 0.25
+
+# Resolved addresses are reused for this long so long-running loops pick up DNS changes
+RESOLVE_TTL = 300
+
+_IN_PROGRESS = {errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN, errno.EALREADY}
+
+_resolve_cache = {}
+_resolve_lock = threading.Lock()
+
+
+def resolve_host(host, family='any'):
+    """Resolve a host once per RESOLVE_TTL and cache its (family, sockaddr) pairs"""
+    key = (host, family)
+    with _resolve_lock:
+        cached = _resolve_cache.get(key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    try:
+        infos = socket.getaddrinfo(host, None, FAMILIES[family], socket.SOCK_STREAM)
+    except socket.gaierror:
+        # Failures are not cached; a transient DNS error must not stick
+        return ()
+
+    addresses = []
+    for af, _, _, _, sockaddr in infos:
+        if af not in FAMILY_NAMES:
+            continue
+        address = (af, sockaddr)
+        if address not in addresses:
+            addresses.append(address)
+    addresses = tuple(addresses)
+
+    if addresses:
+        with _resolve_lock:
+            _resolve_cache[key] = (time.monotonic() + RESOLVE_TTL, addresses)
+    return addresses
+
+
+def positive_float(value):
+    """argparse type for values that must be greater than zero"""
+    import argparse
+
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
+
+def family_name(address):
+    """Human readable address family of a resolved address"""
+    return FAMILY_NAMES[address[0]]
+
+
+def interleave_families(addresses):
+    """Alternate address families, keeping the resolver's preferred family first"""
+    buckets = {}
+    for address in addresses:
+        buckets.setdefault(address[0], []).append(address)
+
+    ordered = []
+    queues = list(buckets.values())
+    while queues:
+        for queue in queues:
+            ordered.append(queue.pop(0))
+        queues = [q for q in queues if q]
+    return ordered
+
+
+def _sockaddr_for_port(sockaddr, port):
+    """Rebuild a resolved sockaddr with the port to probe (keeps IPv6 scope)"""
+    return (sockaddr[0], port) + tuple(sockaddr[2:])
+
+
+def _race(addresses, port, timeout, delay, first_only):
+    """
+    Start non-blocking connects to each address, staggered by `delay` seconds.
+    Returns ({address: handshake_seconds or None}, winner) where winner is the
+    (address, socket) of the first handshake when `first_only`, left open.
+    """
+    results = {address: None for address in addresses}
+    winner = None
+    pending = list(addresses)
+    started = {}
+    selector = selectors.DefaultSelector()
+    deadline = time.monotonic() + timeout
+    next_start = time.monotonic()
+
+    try:
+        while pending or selector.get_map():
+            now = time.monotonic()
+            if now >= deadline:
+                break
+
+            if pending and (now >= next_start or not selector.get_map()):
+                address = pending.pop(0)
+                family, sockaddr = address
+                try:
+                    sock = socket.socket(family, socket.SOCK_STREAM)
+                except OSError:
+                    continue
+                sock.setblocking(False)
+                started[address] = time.perf_counter()
+                err = sock.connect_ex(_sockaddr_for_port(sockaddr, port))
+                if err == 0:
+                    results[address] = time.perf_counter() - started[address]
+                    if first_only:
+                        winner = (address, sock)
+                        break
+                    sock.close()
+                elif err in _IN_PROGRESS:
+                    selector.register(sock, selectors.EVENT_WRITE, address)
+                    next_start = now + delay
+                else:
+                    sock.close()
+                continue
+
+            wait = deadline - now
+            if pending:
+                wait = min(wait, max(0, next_start - now))
+
+            done = False
+            for key, _ in selector.select(wait):
+                sock = key.fileobj
+                address = key.data
+                selector.unregister(sock)
+                if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                    results[address] = time.perf_counter() - started[address]
+                    if first_only:
+                        winner = (address, sock)
+                        done = True
+                        break
+                else:
+                    # A failed attempt lets the next address start right away
+                    next_start = time.monotonic()
+                sock.close()
+            if done:
+                break
+    finally:
+        for key in list(selector.get_map().values()):
+            key.fileobj.close()
+        selector.close()
+
+    return results, winner
+
+
+def connect_addresses(addresses, port, timeout=2, delay=0, first_only=False):
+    """
+    Probe each address and return {address: handshake_seconds or None}.
+    With `first_only` the race stops at the first completed handshake.
+    """
+    results, winner = _race(addresses, port, timeout, delay, first_only)
+    if winner is not None:
+        winner[1].close()
+    return results
+
+
+def open_connection(addresses, port, timeout=2, delay=HAPPY_EYEBALLS_DELAY):
+    """Happy-eyeballs connect that keeps the winning socket: (address, sock) or None"""
+    _, winner = _race(interleave_families(addresses), port, timeout, delay, True)
+    if winner is not None:
+        winner[1].setblocking(True)
+    return winner
+
+
+def probe_families(addresses, port, timeout=2):
+    """Probe every address at once and report OPEN/CLOSED per address family"""
+    status = {}
+    for address, elapsed in connect_addresses(addresses, port, timeout).items():
+        name = family_name(address)
+        if elapsed is not None or name not in status:
+            status[name] = elapsed is not None
+    return status
+
+
+def happy_eyeballs(addresses, port, timeout=2, delay=HAPPY_EYEBALLS_DELAY):
+    """Return the first address that accepts a connection, or None"""
+    results = connect_addresses(interleave_families(addresses), port, timeout,
+                                delay=delay, first_only=True)
+    for address, elapsed in results.items():
+        if elapsed is not None:
+            return address
+    return None
@@ -4,50 +4,63 @@ Port Testing Utility
 Tests port connectivity from external perspective
 """
 
-import socket
 import sys
-import time
 import threading
 from datetime import datetime
-import json
-import argparse
-import subprocess
+
+from port_probe import resolve_host, probe_families, happy_eyeballs, positive_float, FAMILIES
+
+# Health checks, profiling, history, JSON reports and subprocess-based
+# firewall helpers are imported inside the code paths that use them so a
+# plain port check starts as fast as possible (see bench-startup.py).
 
 class PortTester:
-    def __init__(self, host='147.93.113.37'):
+    def __init__(self, host='147.93.113.37', family='any', history_dir=None, record_history=True):
         self.host = host
+        self.family = family
+        self.history_dir = history_dir
+        self.record_history = record_history
+        # Resolve once; every probe reuses the cached addresses
+        self.addresses = resolve_host(host, family)
         self.results = {}
         self.lock = threading.Lock()
 
     def test_port(self, port, timeout=2):
-        """Test if a specific port is open"""
+        """Test if a specific port is open on any address family"""
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(timeout)
-            result = sock.connect_ex((self.host, port))
-            sock.close()
-            return result == 0
-        except socket.gaierror:
-            return False
+            return happy_eyeballs(self.addresses, port, timeout) is not None
         except Exception as e:
             print(f"Error testing port {port}: {e}")
             return False
 
+    def test_port_families(self, port, timeout=2):
+        """Test a port on every address family of the host concurrently"""
+        try:
+            return probe_families(self.addresses, port, timeout)
+        except Exception as e:
+            print(f"Error testing port {port}: {e}")
+            return {}
+
     def test_port_threaded(self, port, service_name=""):
         """Thread-safe port testing"""
-        is_open = self.test_port(port)
+        families = self.test_port_families(port)
+        is_open = any(families.values())
         with self.lock:
             self.results[port] = {
                 'port': port,
                 'service': service_name,
                 'status': 'OPEN' if is_open else 'CLOSED',
+                'families': {name: 'OPEN' if ok else 'CLOSED' for name, ok in families.items()},
                 'timestamp': datetime.now().isoformat()
             }
 
             # Print result immediately
             status_symbol = "✅" if is_open else "❌"
             status_color = "\033[92m" if is_open else "\033[91m"
-            print(f"{status_color}  Port {port:5} ({service_name:15}) : {status_symbol} {self.results[port]['status']}\033[0m")
+            family_detail = ""
+            if len(families) > 1:
+                family_detail = " [" + ", ".join(f"{name} {'OPEN' if ok else 'CLOSED'}" for name, ok in families.items()) + "]"
+            print(f"{status_color}  Port {port:5} ({service_name:15}) : {status_symbol} {self.results[port]['status']}{family_detail}\033[0m")
 
     def scan_common_ports(self):
         """Scan commonly used ports"""
@@ -110,15 +123,53 @@ class PortTester:
 
     def test_http_service(self, port):
         """Test if HTTP service is responding"""
+        from health_check import HealthChecker
+
+        checker = HealthChecker(self.host, self.addresses)
         try:
-            import urllib.request
-            response = urllib.request.urlopen(f'http://{self.host}:{port}/health', timeout=5)
-            return response.status == 200
-        except:
-            return False
+            return checker.check(port)['healthy']
+        finally:
+            checker.close()
+
+    def verify_health(self, **options):
+        """Health-check open HTTP ports concurrently and merge into results"""
+        from health_check import verify_ports
+
+        open_ports = sorted(p for p, r in self.results.items() if r['status'] == 'OPEN')
+        health = verify_ports(self.host, self.addresses, open_ports, **options)
+
+        with self.lock:
+            for port, result in health.items():
+                self.results[port]['health'] = result
+        return health
+
+    def profile_latency(self, duration=None, sample_rate=1.0, ports=None):
+        """Sample handshake latency of open ports and merge into results"""
+        from latency_profile import PortProfiler
+
+        targets = ports or [p for p, r in self.results.items() if r['status'] == 'OPEN']
+
+        print(f"\n⏱️  Profiling handshake latency of {len(targets)} port(s) at {sample_rate:g}/s"
+              f" ({'until Ctrl+C' if duration is None else f'{duration:g}s'})")
+        print("=" * 60)
+
+        profiler = PortProfiler(self.addresses, targets, sample_rate=sample_rate)
+        latency = profiler.run(duration)
+
+        with self.lock:
+            for port, stats in latency.items():
+                self.results.setdefault(port, {
+                    'port': port,
+                    'service': f"Port {port}",
+                    'status': 'OPEN',
+                    'timestamp': datetime.now().isoformat()
+                })['latency'] = stats
+        return latency
 
     def check_firewall_status(self):
         """Check local firewall status"""
+        import subprocess
+
         print("\n🔥 Checking Firewall Status")
         print("=" * 60)
 
@@ -147,6 +198,10 @@ class PortTester:
 
     def generate_report(self):
         """Generate a summary report"""
+        import json
+        from health_check import print_health_report
+        from latency_profile import print_latency_report
+
         open_ports = [p for p, r in self.results.items() if r['status'] == 'OPEN']
         closed_ports = [p for p, r in self.results.items() if r['status'] == 'CLOSED']
 
@@ -154,10 +209,22 @@ class PortTester:
         print("📊 PORT SCAN SUMMARY")
         print("=" * 60)
         print(f"Host: {self.host}")
+        print(f"Addresses: {', '.join(sockaddr[0] for _, sockaddr in self.addresses) or 'unresolved'}")
         print(f"Total ports scanned: {len(self.results)}")
         print(f"Open ports: {len(open_ports)}")
         print(f"Closed ports: {len(closed_ports)}")
 
+        # Per address family breakdown (dual-stack hosts)
+        family_open = {}
+        for r in self.results.values():
+            for name, status in r.get('families', {}).items():
+                family_open.setdefault(name, 0)
+                if status == 'OPEN':
+                    family_open[name] += 1
+        if len(family_open) > 1:
+            for name, count in sorted(family_open.items()):
+                print(f"  {name} open ports: {count}")
+
         if open_ports:
             print("\n✅ Open Ports:")
             for port in sorted(open_ports):
@@ -172,12 +239,31 @@ class PortTester:
             if len(closed_ports) > 10:
                 print(f"  ... and {len(closed_ports) - 10} more")
 
+        print_health_report({p: r['health'] for p, r in self.results.items() if 'health' in r})
+        print_latency_report({p: r['latency'] for p, r in self.results.items() if 'latency' in r})
+
         # Save results to file
         report_file = f'port_scan_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
         with open(report_file, 'w') as f:
             json.dump(self.results, f, indent=2)
         print(f"\n💾 Full report saved to: {report_file}")
 
+        if self.record_history:
+            from port_history import record_scan
+
+            families = {}
+            for p, r in self.results.items():
+                for name, status in r.get('families', {}).items():
+                    families.setdefault(name, [])
+                    if status == 'OPEN':
+                        families[name].append(p)
+            # Per-family series only when both families resolved; otherwise they
+            # would duplicate the run's own record
+            record_scan(self.host, self.results.keys(), open_ports, 'test-ports',
+                        family=self.family,
+                        families=families if len(families) > 1 else None,
+                        directory=self.history_dir)
+
     def suggest_firewall_rules(self):
         """Suggest firewall rules for closed ports"""
         closed_ports = [p for p, r in self.results.items() if r['status'] == 'CLOSED']
@@ -195,19 +281,61 @@ class PortTester:
             print("\n# Save iptables rules:")
             print("sudo iptables-save > /etc/iptables/rules.v4")
 
+def single_port_check(host, port, family='any', timeout=2):
+    """Fast path: one port, no banner or report; exit 0 open, 1 closed, 3 unresolved"""
+    tester = PortTester(host, family, record_history=False)
+    if not tester.addresses:
+        print(f"❌ Unable to resolve {host}")
+        return 3
+    is_open = tester.test_port(port, timeout)
+    print(f"Port {port}: {'✅ OPEN' if is_open else '❌ CLOSED'}")
+    return 0 if is_open else 1
+
 def main():
+    import argparse
+
+    if any(a == '--single-port' or a.startswith('--single-port=') for a in sys.argv[1:]):
+        # Minimal parser: building the full one costs more than the check itself.
+        # Strict parsing, so flags that do not apply (--common, --range...) are errors.
+        fast = argparse.ArgumentParser(description='Port Testing Utility (--single-port fast path)')
+        fast.add_argument('--host', default='147.93.113.37')
+        fast.add_argument('--family', choices=sorted(FAMILIES), default='any')
+        fast.add_argument('--single-port', type=int, required=True)
+        fast.add_argument('--timeout', type=positive_float, default=2)
+        fast_args = fast.parse_args()
+        sys.exit(single_port_check(fast_args.host, fast_args.single_port, fast_args.family, fast_args.timeout))
+
+    from health_check import add_health_arguments, health_options
+
     parser = argparse.ArgumentParser(description='Port Testing Utility')
     parser.add_argument('--host', default='147.93.113.37', help='Host to scan')
     parser.add_argument('--common', action='store_true', help='Scan common ports')
     parser.add_argument('--range', nargs=2, type=int, metavar=('START', 'END'),
                        help='Scan a port range')
     parser.add_argument('--port', type=int, help='Test a specific port')
+    parser.add_argument('--single-port', type=int, metavar='PORT',
+                       help='Check one port and exit without banner or report '
+                            '(0 open, 1 closed, 3 unresolved host; 2 is a usage error)')
+    parser.add_argument('--timeout', type=positive_float, default=2, help='Connect timeout for --single-port')
+    parser.add_argument('--family', choices=sorted(FAMILIES), default='any',
+                       help='Address family to scan: 4, 6 or any (dual-stack)')
     parser.add_argument('--firewall', action='store_true', help='Check firewall status')
     parser.add_argument('--suggest', action='store_true', help='Suggest firewall rules')
+    parser.add_argument('--history-dir', help='Scan history directory (default ./port_history)')
+    parser.add_argument('--no-history', action='store_true', help='Do not append this run to the history')
+    add_health_arguments(parser)
+    parser.add_argument('--profile', type=float, metavar='SECONDS',
+                       help='Profile handshake latency of open ports (0 = until Ctrl+C)')
+    parser.add_argument('--sample-rate', type=positive_float, default=1.0, metavar='HZ',
+                       help='Latency samples per second per port (default 1)')
 
     args = parser.parse_args()
 
-    tester = PortTester(args.host)
+    if args.single_port is not None:
+        # Abbreviated spellings (e.g. --single) miss the fast-path check above
+        sys.exit(single_port_check(args.host, args.single_port, args.family, args.timeout))
+
+    tester = PortTester(args.host, args.family, args.history_dir, not args.no_history)
 
     print(f"""
 ╔════════════════════════════════════════════════════╗
@@ -221,16 +349,31 @@ def main():
     if args.firewall:
         tester.check_firewall_status()
 
+    if not tester.addresses:
+        print(f"❌ Unable to resolve {args.host}")
+        sys.exit(1)
+
     if args.port:
-        is_open = tester.test_port(args.port)
-        status = "✅ OPEN" if is_open else "❌ CLOSED"
-        print(f"Port {args.port}: {status}")
-    elif args.range:
-        tester.scan_range(args.range[0], args.range[1])
-        tester.generate_report()
+        families = tester.test_port_families(args.port)
+        for name, is_open in families.items():
+            status = "✅ OPEN" if is_open else "❌ CLOSED"
+            print(f"Port {args.port} ({name}): {status}")
+        if args.profile is not None and any(families.values()):
+            from latency_profile import print_latency_report
+
+            latency = tester.profile_latency(args.profile or None, args.sample_rate, ports=[args.port])
+            print_latency_report(latency)
     else:
-        # Default to common ports scan
-        tester.scan_common_ports()
+        if args.range:
+            tester.scan_range(args.range[0], args.range[1])
+        else:
+            # Default to common ports scan
+            tester.scan_common_ports()
+
+        if args.health:
+            tester.verify_health(**health_options(args))
+        if args.profile is not None:
+            tester.profile_latency(args.profile or None, args.sample_rate)
         tester.generate_report()
 
     if args.suggest: